@@ -7,6 +7,7 @@ if __name__ == "__main__":
                 "templates/body_template.jinja",
                 "templates/method_template.jinja",
                 "templates/import_template.jinja",
+                "templates/stream_template.jinja",
             ]
         }
     )
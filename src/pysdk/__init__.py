@@ -1,2 +1,3 @@
 from .baseclass import ApiBase as ApiSDK
-from .restricted_parameters import return_types
\ No newline at end of file
+from .restricted_parameters import priorities, return_types, stream_types
+from .scheduling import DeadlineExceededError
\ No newline at end of file
@@ -1,14 +1,21 @@
 import asyncio
 import json
 import logging
+import sqlite3
 import urllib
 from pprint import pformat
 from typing import Optional, Union
 
 import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
 
 from pysdk.metaclass import ApiMetaclass
 from pysdk.restricted_parameters import return_types
+from pysdk.scheduling import RequestScheduler
+from pysdk.store import ResponseStore
+from pysdk.streaming import SSEDecoder, iter_response
+from pysdk.tracing import RequestTracer
 from pysdk.utils import format_trace, xray
 
 
@@ -29,6 +36,12 @@ class ApiBase(metaclass=ApiMetaclass):
         retry_delay: int = 1,
         verbose: bool = True,
         log_level: Optional[Union[str, int]] = None,
+        max_concurrency: Optional[int] = None,
+        priority_weights: Optional[dict[str, float]] = None,
+        max_reconnect_delay: float = 60,
+        trace_sample_rate: float = 0,
+        trace_callbacks: Optional[list] = None,
+        response_store: Optional[ResponseStore] = None,
         **client_kwargs,
     ):
         self.n_retries = 0
@@ -37,8 +50,16 @@ class ApiBase(metaclass=ApiMetaclass):
         self.session = None
         self.open_contexts = 0
         self.retry_delay = retry_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        # persistent store of GET responses, shared between processes
+        self.store = response_store
         self.logger = logging.getLogger(self.__class__.__name__)
 
+        # admits requests by priority and deadline, shared by all requests
+        # sent through this instance
+        self.scheduler = RequestScheduler(max_concurrency, priority_weights)
+
         if verbose and not log_level:
             log_level = logging.INFO
 
@@ -57,6 +78,16 @@ class ApiBase(metaclass=ApiMetaclass):
             sock_read=timeout,
         )
 
+        # opt-in phase timing of sampled requests, see pysdk.tracing
+        self.tracer = None
+
+        if trace_sample_rate:
+            self.tracer = RequestTracer(trace_sample_rate, trace_callbacks)
+            client_kwargs["trace_configs"] = [
+                *client_kwargs.get("trace_configs", []),
+                self.tracer.trace_config,
+            ]
+
         self.client_args = dict(trust_env=True, timeout=timeout, **client_kwargs)
 
         if not hasattr(self, "headers"):
@@ -114,15 +145,22 @@ class ApiBase(metaclass=ApiMetaclass):
         params: dict = None,
         data: dict = None,
         allow_redirects: bool = True,
+        priority: Optional[str] = None,
+        deadline: Optional[float] = None,
+        endpoint_name: Optional[str] = None,
+        use_store: bool = True,
         **kwargs,
     ):
         """send a async request to the api,
 
         performs:
+            - lookup of GET requests in the response store
+            - scheduling by priority and deadline
             - url encoding
             - retries
             - error handling
             - response parsing
+            - phase timing of sampled requests
             - opens/closes a session if not already open,
               only use when sending one request at a time
               with this class
@@ -130,12 +168,186 @@ class ApiBase(metaclass=ApiMetaclass):
         Args:
             url: Url to call
             params: Query parameters to be added to the url
+            priority: priority class of the request, see pysdk.priorities
+            deadline: seconds from now within which the response is needed,
+                fails with DeadlineExceededError once it can not be met
+            endpoint_name: name of the generated method, used in traces
+            use_store: answer from and save to the response store, if set
 
         Returns:
             output of self.parse_response:
         """
 
-        # encode query parameters into the url
+        url = self._encode_url(url, params)
+
+        self.logger.debug(format_trace("Method", method.upper()))
+        self.logger.debug(xray(url))
+
+        # absolute deadline, shared by the scheduler and the request timeout
+        deadline_at = None
+        request_kwargs = {}
+        trace = None
+
+        if deadline is not None:
+            deadline_at = self.scheduler.now() + deadline
+
+        # streamed responses are parsed while the caller iterates over them,
+        # so the request is only sent once iteration starts
+        if self._stream_type(kwargs.get("return_type")):
+            return self._stream_request(
+                method,
+                url,
+                data=data,
+                allow_redirects=allow_redirects,
+                priority=priority,
+                deadline_at=deadline_at,
+                **kwargs,
+            )
+
+        # idempotent requests are answered from the store without a slot
+        store_key = None
+
+        if (
+            self.store
+            and use_store
+            and method == "get"
+            and self._decodes_body(kwargs.get("return_type"))
+        ):
+            store_key = self.store.key(method, url, self.headers)
+            request_info = aiohttp.RequestInfo(
+                URL(url), method.upper(), CIMultiDictProxy(CIMultiDict(self.headers))
+            )
+            stored = await asyncio.to_thread(self.store.get, store_key, request_info)
+
+            if stored:
+                self.logger.info("Using stored response")
+                return await self.parse_response(stored, **kwargs)
+
+        # wait for a slot, open a session if not already open and send request
+        try:
+            # deadlines are estimated from the latency of the same endpoint
+            endpoint = endpoint_name or f"{method} {url.split('?')[0]}"
+
+            async with self.scheduler.slot(priority, deadline_at, endpoint):
+                # do not wait for the response longer than the deadline
+                if deadline_at is not None:
+                    request_kwargs["timeout"] = self._deadline_timeout(deadline_at)
+
+                # timed after admission, so queueing is not part of the trace
+                if self.tracer:
+                    trace = self.tracer.start(method, url, endpoint_name)
+                    request_kwargs["trace_request_ctx"] = trace
+
+                async with (
+                    self as s,
+                    getattr(s, method)(
+                        url,
+                        data=json.dumps(data) if data else None,
+                        headers=self.headers,
+                        allow_redirects=allow_redirects,
+                        **request_kwargs,
+                    ) as r,
+                ):
+                    response = await self.parse_response(r, **kwargs)
+
+                    # kept once parse_response accepted it, so a warm store
+                    # answers exactly like the network, the response keeps the
+                    # body it read but refuses to return it after release
+                    body = None
+                    if store_key and self._storable(r):
+                        body = await r.read()
+
+                if trace:
+                    self.tracer.finish(
+                        trace,
+                        status=r.status,
+                        parsed=self._decodes_body(kwargs.get("return_type")),
+                    )
+
+                # written after the trace is finished, so it is not timed as parse
+                if body is not None:
+                    await self._store_response(store_key, r, body)
+
+                return response
+
+        # catch all exceptions and parse in handle_error
+        except Exception as e:
+            if trace:
+                self.tracer.finish(trace, error=e)
+
+            return await self.handle_error(e, getattr(self, method), url, **kwargs)
+
+    def _decodes_body(self, return_type=None) -> bool:
+        """whether the return type decodes the body, only then a stored body
+        can stand in for the response object"""
+
+        # use class default if type is not specified in request
+        if not return_type:
+            return_type = self.return_type
+
+        if isinstance(return_type, return_types):
+            return_type = return_type.value
+
+        return return_type in (return_types.JSON.value, return_types.IMAGE.value)
+
+    @staticmethod
+    def _storable(response) -> bool:
+        """whether the response may be stored and shared between processes"""
+
+        cache_control = {
+            directive.strip().split("=")[0].lower()
+            for directive in response.headers.get("Cache-Control", "").split(",")
+        }
+
+        return response.status == 200 and not cache_control & {"no-store", "private"}
+
+    async def _store_response(self, key: str, response, body: bytes):
+        """save the response and the body parse_response read to the store"""
+
+        # a failing store should not fail the request
+        try:
+            await asyncio.to_thread(
+                self.store.put,
+                key,
+                response.status,
+                response.reason,
+                dict(response.headers),
+                body,
+            )
+        except (OSError, sqlite3.Error) as e:
+            self.logger.warning(f"Could not store response: {e!r}")
+
+    def _deadline_timeout(self, deadline_at: float) -> aiohttp.ClientTimeout:
+        """session timeout with the total limited to the time left until the
+        deadline"""
+
+        timeout = self.client_args["timeout"]
+        remaining = deadline_at - self.scheduler.now()
+
+        return aiohttp.ClientTimeout(
+            total=remaining if timeout.total is None else min(timeout.total, remaining),
+            connect=timeout.connect,
+            sock_read=timeout.sock_read,
+            sock_connect=timeout.sock_connect,
+        )
+
+    def _stream_timeout(self, heartbeat: float) -> aiohttp.ClientTimeout:
+        """session timeout without a total, which would end the stream, and
+        with the heartbeat as read timeout to detect a dead stream"""
+
+        timeout = self.client_args["timeout"]
+
+        return aiohttp.ClientTimeout(
+            total=None,
+            connect=timeout.connect,
+            sock_read=heartbeat,
+            sock_connect=timeout.sock_connect,
+        )
+
+    @staticmethod
+    def _encode_url(url: str, params: dict = None) -> str:
+        """encode query parameters into the url"""
+
         if params:
             query_string = urllib.parse.urlencode(params)
 
@@ -144,25 +356,82 @@ class ApiBase(metaclass=ApiMetaclass):
             else:
                 url += "?" + query_string
 
-        self.logger.debug(format_trace("Method", method.upper()))
-        self.logger.debug(xray(url))
+        return url
 
-        # open a session if not already open and send request
-        try:
-            async with (
-                self as s,
-                getattr(s, method)(
-                    url,
-                    data=json.dumps(data) if data else None,
-                    headers=self.headers,
-                    allow_redirects=allow_redirects,
-                ) as r,
-            ):
-                return await self.parse_response(r, **kwargs)
+    def _stream_type(self, return_type=None) -> Optional[str]:
+        """return the streaming return type as a string, or None if the
+        response should not be streamed"""
 
-        # catch all exceptions and parse in handle_error
-        except Exception as e:
-            return await self.handle_error(e, getattr(self, method), url, **kwargs)
+        # use class default if type is not specified in request
+        if not return_type:
+            return_type = self.return_type
+
+        if isinstance(return_type, return_types):
+            return_type = return_type.value
+
+        if return_type in (return_types.JSON_STREAM.value, return_types.NDJSON.value):
+            return return_type
+
+        return None
+
+    async def _stream_request(
+        self,
+        method: str,
+        url: str,
+        *,
+        data: dict = None,
+        allow_redirects: bool = True,
+        priority: Optional[str] = None,
+        deadline_at: Optional[float] = None,
+        return_type=None,
+        json_path: Optional[str] = None,
+        model=None,
+    ):
+        """send a request and yield the items of the response body while it
+        is being received, keeps the session open until iteration is done
+
+        Exceptions raised during iteration are not retried, as items might
+        already have been handed to the caller.
+
+        Args:
+            url: Url to call, including query parameters
+            priority: priority class of the request, see pysdk.priorities
+            deadline_at: time.monotonic() timestamp before which the stream
+                needs to be admitted
+            return_type: return_types.JSON_STREAM for a json array or
+                return_types.NDJSON for newline delimited json
+            json_path: dotted path to the array inside a wrapping object,
+                only used for return_types.JSON_STREAM
+            model: pydantic model to validate each item with
+
+        Yields:
+            items of the response, as model instances if model is given
+        """
+
+        stream_type = self._stream_type(return_type)
+
+        # a stream holds its slot until iteration is done, but its duration
+        # says nothing about the latency of other requests
+        async with (
+            self.scheduler.slot(priority, deadline_at, measure=False),
+            self as s,
+            getattr(s, method)(
+                url,
+                data=json.dumps(data) if data else None,
+                headers=self.headers,
+                allow_redirects=allow_redirects,
+            ) as r,
+        ):
+            self.logger.info(xray(r.status))
+            self.logger.info(f"Streaming response as {stream_type}")
+
+            # an error body is not the expected stream, fail before parsing
+            r.raise_for_status()
+
+            async for item in iter_response(
+                r, stream_type, json_path=json_path, model=model
+            ):
+                yield item
 
     async def get(
         self, url: str, *, allow_redirects: bool = True, params: dict = None, **kwargs
@@ -201,6 +470,169 @@ class ApiBase(metaclass=ApiMetaclass):
             "patch", url, data=data, params=params, **kwargs
         )
 
+    async def _reconnect(self, reconnects: int, delay: float, max_reconnects=None):
+        """wait before reconnecting a stream, backing off exponentially"""
+
+        if max_reconnects is None:
+            max_reconnects = self.max_retries
+
+        if reconnects > max_reconnects:
+            raise MaxRetriesError("Max reconnects reached")
+
+        delay = min(delay * 2 ** (reconnects - 1), self.max_reconnect_delay)
+        self.logger.info(f"Reconnecting stream in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+    async def sse(
+        self,
+        url: str,
+        *,
+        params: dict = None,
+        model=None,
+        last_event_id: Optional[str] = None,
+        heartbeat: float = 60,
+        max_reconnects: Optional[int] = None,
+    ):
+        """follow a server-sent events endpoint
+
+        Reconnects when the connection drops or no data, including comment
+        heartbeats, arrives for `heartbeat` seconds. The reconnect resumes
+        from the last received event with the Last-Event-ID header and waits
+        the retry time sent by the server, or retry_delay, backing off
+        exponentially. The successful connection resets the backoff.
+
+        Streams are not admitted by the scheduler, as they hold on to their
+        connection for as long as they are followed.
+
+        Args:
+            url: Url to call
+            params: Query parameters to be added to the url
+            model: pydantic model to validate the json data of each event with
+            last_event_id: id of the last event seen, to resume from
+            heartbeat: seconds without data after which the stream is dead
+            max_reconnects: consecutive reconnects before giving up, defaults
+                to max_retries
+
+        Yields:
+            ServerSentEvent, or instances of model if given
+        """
+
+        url = self._encode_url(url, params)
+        decoder = SSEDecoder(last_event_id)
+        reconnects = 0
+
+        timeout = self._stream_timeout(heartbeat)
+
+        while True:
+            headers = {
+                **self.headers,
+                "Accept": "text/event-stream",
+                "Cache-Control": "no-cache",
+            }
+
+            if decoder.last_event_id:
+                headers["Last-Event-ID"] = decoder.last_event_id
+
+            try:
+                async with (
+                    self as s,
+                    s.get(url, headers=headers, timeout=timeout) as r,
+                ):
+                    # the server asks to stop reconnecting
+                    if r.status == 204:
+                        return
+
+                    r.raise_for_status()
+                    reconnects = 0
+
+                    async for event in decoder.events(r.content.iter_any()):
+                        if model:
+                            yield model.model_validate_json(event.data)
+                        else:
+                            yield event
+
+            except aiohttp.ClientResponseError as e:
+                # client errors will not resolve by reconnecting
+                if e.status < 500:
+                    raise e
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.logger.info(f"Stream interrupted: {e!r}")
+
+            reconnects += 1
+            await self._reconnect(
+                reconnects, decoder.retry or self.retry_delay, max_reconnects
+            )
+
+    async def websocket(
+        self,
+        url: str,
+        *,
+        params: dict = None,
+        model=None,
+        heartbeat: float = 30,
+        max_reconnects: Optional[int] = None,
+    ):
+        """follow a websocket endpoint
+
+        Pings the server every `heartbeat` seconds and reconnects with
+        exponential backoff when the pong does not arrive or the connection
+        drops. A normal closure by the server ends the stream.
+
+        Streams are not admitted by the scheduler, as they hold on to their
+        connection for as long as they are followed.
+
+        Args:
+            url: Url to call
+            params: Query parameters to be added to the url
+            model: pydantic model to validate each message with
+            heartbeat: seconds between pings
+            max_reconnects: consecutive reconnects before giving up, defaults
+                to max_retries
+
+        Yields:
+            text or bytes of each message, or instances of model if given
+        """
+
+        url = self._encode_url(url, params)
+        reconnects = 0
+
+        while True:
+            try:
+                async with (
+                    self as s,
+                    s.ws_connect(url, headers=self.headers, heartbeat=heartbeat) as ws,
+                ):
+                    reconnects = 0
+
+                    async for message in ws:
+                        if message.type not in (
+                            aiohttp.WSMsgType.TEXT,
+                            aiohttp.WSMsgType.BINARY,
+                        ):
+                            break
+
+                        if model:
+                            yield model.model_validate_json(message.data)
+                        else:
+                            yield message.data
+
+                if ws.close_code == aiohttp.WSCloseCode.OK:
+                    return
+
+                self.logger.info(f"Stream closed with code {ws.close_code}")
+
+            except aiohttp.ClientResponseError as e:
+                # client errors will not resolve by reconnecting
+                if e.status < 500:
+                    raise e
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.logger.info(f"Stream interrupted: {e!r}")
+
+            reconnects += 1
+            await self._reconnect(reconnects, self.retry_delay, max_reconnects)
+
     async def parse_response(self, response, return_type=None):
         """
 
@@ -8,6 +8,8 @@ import jinja2
 import pydantic_core
 from pydantic import BaseModel
 
+from pysdk.restricted_parameters import stream_types
+
 MODEL_IMPORTS = []
 MODEL_IMPORTS_2 = (
     []
@@ -142,6 +144,12 @@ def _create_method(
     query_parameters = re.findall(r"\{(.+?)\}", config["endpoint"])
     query_parameters = set(query_parameters)
 
+    # streaming endpoints return an async iterator of events instead
+    if stream := config.get("stream", None):
+        return _create_stream_method(
+            name, config, stream, query_parameters, environment
+        )
+
     body = config.get("body", None)
 
     if body:
@@ -164,6 +172,32 @@ def _create_method(
     return code_string
 
 
+def _create_stream_method(
+    name: str,
+    config: dict,
+    stream: Union[stream_types, str],
+    query_parameters: set,
+    environment: jinja2.Environment,
+):
+    """generate a method following a server-sent events or websocket endpoint"""
+
+    if isinstance(stream, stream_types):
+        stream = stream.value
+
+    if stream not in [t.value for t in stream_types]:
+        raise ValueError(f"Unsupported stream type {stream!r} for endpoint {name}")
+
+    with resources.open_text("pysdk.templates", "stream_template.jinja") as f:
+        stream_template = environment.from_string(f.read())
+
+    return stream_template.render(
+        method_name=name,
+        endpoint=config["endpoint"],
+        query_parameters=query_parameters,
+        stream=stream,
+    )
+
+
 def _build_methods(cls, namespace):
     # set up jinja environment for code generation
     environment = jinja2.Environment()
@@ -5,3 +5,18 @@ class return_types(Enum):
 
     IMAGE: str = "image"
     JSON: str = "json"
+    JSON_STREAM: str = "json_stream"
+    NDJSON: str = "ndjson"
+
+
+class priorities(Enum):
+
+    HIGH: str = "high"
+    NORMAL: str = "normal"
+    LOW: str = "low"
+
+
+class stream_types(Enum):
+
+    SSE: str = "sse"
+    WEBSOCKET: str = "websocket"
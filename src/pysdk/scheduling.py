@@ -0,0 +1,211 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Optional, Union
+
+from pysdk.restricted_parameters import priorities
+
+# relative share of the concurrency each priority class gets when all compete
+DEFAULT_WEIGHTS = {
+    priorities.HIGH.value: 8,
+    priorities.NORMAL.value: 4,
+    priorities.LOW.value: 1,
+}
+
+# smoothing factor of the moving average of the latency of an endpoint
+LATENCY_ALPHA = 0.2
+
+
+class DeadlineExceededError(Exception):
+    pass
+
+
+class RequestScheduler:
+    """admits requests under a shared concurrency cap
+
+    Waiting requests are admitted by weighted fair queuing over their priority
+    classes, so low priority requests get a share of the capacity instead of
+    starving. Requests of which the deadline can not be met anymore, based on
+    a moving average of the latency of their endpoint, fail before being sent.
+
+    Args:
+        max_concurrency: maximum number of requests in flight, unlimited
+            if None
+        weights: weight per priority class, merged with DEFAULT_WEIGHTS
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        weights: Optional[dict[str, float]] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.active = 0
+
+        # moving average of the latency per endpoint, so slow endpoints do
+        # not fail the deadlines of fast ones
+        self.latency: dict[str, float] = {}
+
+        # waiters as (finish tag, sequence number, priority, deadline,
+        # endpoint, future)
+        self.queue: list = []
+        self.counter = itertools.count()
+        self.virtual_time = 0.0
+        self.finish_tags: dict[str, float] = {}
+
+    @staticmethod
+    def now() -> float:
+        return time.monotonic()
+
+    def doomed(
+        self, deadline: Optional[float], endpoint: Optional[str] = None
+    ) -> bool:
+        """whether a request to the endpoint started now would finish after
+        the deadline"""
+
+        if deadline is None:
+            return False
+
+        return self.now() + self.latency.get(endpoint, 0.0) > deadline
+
+    def _full(self) -> bool:
+        return self.max_concurrency is not None and self.active >= self.max_concurrency
+
+    def _priority(self, priority: Union[priorities, str, None]) -> str:
+        if isinstance(priority, priorities):
+            priority = priority.value
+
+        priority = priority or priorities.NORMAL.value
+
+        if priority not in self.weights:
+            raise ValueError(f"Unknown priority {priority!r}")
+
+        return priority
+
+    def _dispatch(self):
+        """hand free slots to the waiters with the lowest finish tag"""
+
+        while self.queue and not self._full():
+            tag, _, priority, deadline, endpoint, future = heapq.heappop(self.queue)
+
+            # waiter gave up while queued
+            if future.done():
+                continue
+
+            self.virtual_time = tag
+
+            if self.doomed(deadline, endpoint):
+                future.set_exception(
+                    DeadlineExceededError(f"Deadline of {priority} request exceeded")
+                )
+                continue
+
+            self.active += 1
+            future.set_result(None)
+
+    async def acquire(
+        self,
+        priority: Union[priorities, str, None] = None,
+        deadline: Optional[float] = None,
+        endpoint: Optional[str] = None,
+    ):
+        """wait for a free slot
+
+        Args:
+            priority: priority class of the request
+            deadline: time.monotonic() timestamp before which the response
+                is needed, or None
+            endpoint: name of the endpoint, whose latency estimate is used
+
+        Raises:
+            DeadlineExceededError: if the deadline can not be met
+        """
+
+        priority = self._priority(priority)
+
+        if self.doomed(deadline, endpoint):
+            raise DeadlineExceededError(f"Deadline of {priority} request exceeded")
+
+        if not self.queue and not self._full():
+            self.active += 1
+            return
+
+        # finish tag of weighted fair queuing, a higher weight advances slower
+        tag = (
+            max(self.virtual_time, self.finish_tags.get(priority, 0.0))
+            + 1 / self.weights[priority]
+        )
+        self.finish_tags[priority] = tag
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self.queue,
+            (tag, next(self.counter), priority, deadline, endpoint, future),
+        )
+
+        # give up once the queue wait leaves too little time for the request
+        timeout = None
+        if deadline is not None:
+            timeout = deadline - self.now() - self.latency.get(endpoint, 0.0)
+
+        try:
+            done, _ = await asyncio.wait({future}, timeout=timeout)
+
+        except asyncio.CancelledError:
+            # give back the slot if it was handed over while being cancelled
+            if future.done() and not future.cancelled() and not future.exception():
+                self.release()
+            future.cancel()
+            raise
+
+        if not done:
+            future.cancel()
+            raise DeadlineExceededError(f"Deadline of {priority} request exceeded")
+
+        # raises DeadlineExceededError if the deadline expired in the queue
+        future.result()
+
+    def release(
+        self, duration: Optional[float] = None, endpoint: Optional[str] = None
+    ):
+        """free a slot and update the latency estimate of the endpoint with
+        the duration"""
+
+        self.active -= 1
+
+        if duration is not None:
+            latency = self.latency.get(endpoint, duration)
+            self.latency[endpoint] = latency + LATENCY_ALPHA * (duration - latency)
+
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: Union[priorities, str, None] = None,
+        deadline: Optional[float] = None,
+        endpoint: Optional[str] = None,
+        measure: bool = True,
+    ):
+        """hold a slot while the request is in flight
+
+        Args:
+            endpoint: name of the endpoint, for its latency estimate
+            measure: use the duration for the latency estimate, disable for
+                long lived requests such as streams
+        """
+
+        await self.acquire(priority, deadline, endpoint)
+        start = self.now()
+
+        try:
+            yield
+        except BaseException:
+            # failed requests, such as timeouts, would skew the estimate
+            self.release()
+            raise
+
+        self.release(self.now() - start if measure else None, endpoint)
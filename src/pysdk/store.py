@@ -0,0 +1,334 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Optional, Union
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+
+# request headers which change the response, others are not part of the key
+VARY_HEADERS = ("Authorization", "Accept", "Accept-Language")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    status INTEGER NOT NULL,
+    reason TEXT,
+    headers TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+CREATE INDEX IF NOT EXISTS responses_created ON responses (created);
+CREATE INDEX IF NOT EXISTS responses_digest ON responses (digest);
+
+-- total size of the bodies, kept up to date so eviction does not scan
+CREATE TABLE IF NOT EXISTS stats (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    total INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats
+    SELECT 0, COALESCE(SUM(size), 0) FROM responses;
+CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses
+    BEGIN UPDATE stats SET total = total + new.size; END;
+CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses
+    BEGIN UPDATE stats SET total = total - old.size; END;
+"""
+
+# content types aiohttp accepts when decoding json
+JSON_CONTENT_TYPE = re.compile(r"^application/(?:[\w.+-]+?\+)?json")
+
+# seconds between updates of the access time of an entry, so most reads
+# do not need the write lock of the database
+ACCESS_RESOLUTION = 60
+
+
+class CachedResponse:
+    """stored response with the part of the aiohttp response interface used
+    by parse_response to decode the body, it is never returned as is"""
+
+    def __init__(
+        self,
+        status: int,
+        reason: str,
+        headers: dict,
+        body: bytes,
+        request_info: Optional[aiohttp.RequestInfo] = None,
+    ):
+        self.status = status
+        self.reason = reason
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self.body = body
+        self.request_info = request_info
+        self.history = ()
+
+    async def read(self) -> bytes:
+        return self.body
+
+    async def text(self, encoding: str = "utf-8") -> str:
+        return self.body.decode(encoding)
+
+    async def json(self, *, loads=json.loads, content_type="application/json"):
+        """decode the body like aiohttp.ClientResponse.json, including its
+        check of the content type"""
+
+        if content_type:
+            received = self.headers.get("Content-Type", "").lower()
+
+            if content_type == "application/json":
+                expected = JSON_CONTENT_TYPE.match(received) is not None
+            else:
+                expected = content_type in received
+
+            if not expected:
+                raise aiohttp.ContentTypeError(
+                    self.request_info,
+                    self.history,
+                    status=self.status,
+                    message=(
+                        f"Attempt to decode JSON with unexpected mimetype: {received}"
+                    ),
+                    headers=self.headers,
+                )
+
+        if not self.body.strip():
+            return None
+
+        # json decodes bytes directly, without decoding to a str first
+        return loads(self.body)
+
+
+class ResponseStore:
+    """disk backed response store, shared by all processes using the directory
+
+    Responses are indexed in sqlite by a hash of the method, url and the
+    VARY_HEADERS of the request. The bodies are stored as content addressed
+    files, so identical responses are stored once. Entries expire after
+    `ttl` seconds and the least recently used entries are evicted once the
+    bodies exceed `max_size` bytes.
+
+    Args:
+        path: directory of the store, created if it does not exist
+        ttl: seconds a response stays valid, forever if None
+        max_size: maximum total size of the bodies in bytes, unlimited if None
+        vary_headers: request headers which are part of the key
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        ttl: Optional[float] = 3600,
+        max_size: Optional[int] = 2**30,
+        vary_headers: tuple[str, ...] = VARY_HEADERS,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_size = max_size
+        self.vary_headers = vary_headers
+
+        (self.path / "blobs").mkdir(parents=True, exist_ok=True)
+
+        with self._connect() as db:
+            # write ahead logging lets readers continue while another
+            # process writes
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """connection per operation, so the store can be used from any thread"""
+
+        with closing(
+            sqlite3.connect(self.path / "index.sqlite", timeout=30)
+        ) as db, db:
+            yield db
+
+    def _blob(self, digest: str) -> Path:
+        return self.path / "blobs" / digest[:2] / digest
+
+    def key(self, method: str, url: str, headers: dict) -> str:
+        vary = {
+            name.lower(): value
+            for name, value in headers.items()
+            if name.lower() in {h.lower() for h in self.vary_headers}
+        }
+
+        return hashlib.sha256(
+            json.dumps([method.upper(), url, vary], sort_keys=True).encode()
+        ).hexdigest()
+
+    def get(
+        self, key: str, request_info: Optional[aiohttp.RequestInfo] = None
+    ) -> Optional[CachedResponse]:
+        """return the stored response, or None if missing or expired
+
+        Args:
+            key: key of the request, see ResponseStore.key
+            request_info: request the response is looked up for, used in
+                errors raised by the response
+        """
+
+        now = time.time()
+
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT digest, status, reason, headers, created, accessed "
+                "FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            digest, status, reason, headers, created, accessed = row
+
+            if self.ttl is not None and created + self.ttl < now:
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                orphans = self._orphans(db, [digest])
+                body = None
+
+            else:
+                # the access time only needs to be precise enough for eviction
+                if now - accessed > ACCESS_RESOLUTION:
+                    db.execute(
+                        "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+                    )
+                orphans = []
+
+                try:
+                    body = self._blob(digest).read_bytes()
+
+                # removed by another process evicting it
+                except FileNotFoundError:
+                    db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    body = None
+
+        self._unlink(orphans)
+
+        if body is None:
+            return None
+
+        return CachedResponse(status, reason, json.loads(headers), body, request_info)
+
+    def put(self, key: str, status: int, reason: str, headers: dict, body: bytes):
+        """store a response body, evicting old responses if needed"""
+
+        if self.max_size is not None and len(body) > self.max_size:
+            return
+
+        digest = hashlib.sha256(body).hexdigest()
+        blob = self._blob(digest)
+
+        # write to a temporary file and move it into place, so other
+        # processes never read a partial body
+        if not blob.exists():
+            blob.parent.mkdir(exist_ok=True)
+
+            fd, tmp = tempfile.mkstemp(dir=blob.parent, prefix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(body)
+                os.replace(tmp, blob)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+        now = time.time()
+
+        with self._connect() as db:
+            previous = db.execute(
+                "SELECT digest FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            # delete instead of replace, so the delete trigger updates the total
+            if previous:
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+            db.execute(
+                "INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    digest,
+                    len(body),
+                    status,
+                    reason,
+                    json.dumps(dict(headers)),
+                    now,
+                    now,
+                ),
+            )
+
+            orphans = self._orphans(db, [previous[0]] if previous else [])
+            orphans += self._evict(db)
+
+        self._unlink(orphans)
+
+    def _evict(self, db: sqlite3.Connection) -> list[str]:
+        """delete expired and least recently used entries, returns the digests
+        which are not referenced anymore"""
+
+        removed = []
+
+        if self.ttl is not None:
+            expired = time.time() - self.ttl
+            removed += [
+                digest
+                for (digest,) in db.execute(
+                    "SELECT digest FROM responses WHERE created < ?", (expired,)
+                ).fetchall()
+            ]
+            db.execute("DELETE FROM responses WHERE created < ?", (expired,))
+
+        if self.max_size is not None:
+            (total,) = db.execute("SELECT total FROM stats").fetchone()
+
+            # least recently used entries until the total fits
+            evicted = []
+
+            if total > self.max_size:
+                for key, digest, size in db.execute(
+                    "SELECT key, digest, size FROM responses ORDER BY accessed"
+                ):
+                    evicted.append(key)
+                    removed.append(digest)
+                    total -= size
+
+                    if total <= self.max_size:
+                        break
+
+            db.executemany(
+                "DELETE FROM responses WHERE key = ?", [(key,) for key in evicted]
+            )
+
+        return self._orphans(db, removed)
+
+    @staticmethod
+    def _orphans(db: sqlite3.Connection, digests: list[str]) -> list[str]:
+        return [
+            digest
+            for digest in set(digests)
+            if not db.execute(
+                "SELECT 1 FROM responses WHERE digest = ? LIMIT 1", (digest,)
+            ).fetchone()
+        ]
+
+    def _unlink(self, digests: list[str]):
+        for digest in digests:
+            self._blob(digest).unlink(missing_ok=True)
+
+    def clear(self):
+        """remove all stored responses"""
+
+        with self._connect() as db:
+            digests = [d for (d,) in db.execute("SELECT digest FROM responses")]
+            db.execute("DELETE FROM responses")
+
+        self._unlink(digests)
@@ -0,0 +1,422 @@
+import codecs
+import json
+import re
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from pydantic import BaseModel
+
+from pysdk.restricted_parameters import return_types
+
+# whitespace as defined by the json spec
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# characters which change the nesting of a json value outside of strings
+STRUCTURE = re.compile(r'["{}\[\]]')
+
+# characters which end or escape inside a json string
+STRING_SPECIAL = re.compile(r'["\\]')
+
+# characters which end a number, true, false or null
+SCALAR_END = re.compile(r"[ \t\n\r,:\]}]")
+
+# server-sent events lines may end with any of these
+LINE_END = re.compile(r"\r\n|\r|\n")
+
+CHUNK_SIZE = 2**16
+
+# largest single item held in memory, guards against malformed bodies
+MAX_ITEM_SIZE = 2**26
+
+
+class StreamParseError(ValueError):
+    pass
+
+
+class _JsonBuffer:
+    """text buffer over an async byte stream which only holds the part of the
+    body that has not been consumed yet"""
+
+    def __init__(
+        self,
+        chunks: AsyncIterator[bytes],
+        encoding: str = "utf-8",
+        max_item_size: int = MAX_ITEM_SIZE,
+    ):
+        self.chunks = chunks
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.decoder_json = json.JSONDecoder()
+        self.max_item_size = max_item_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+        # state of scanning for the end of a value, kept across chunks
+        self.scalar = False
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    async def read(self) -> Optional[str]:
+        """decode the next chunk, returns None at end of stream"""
+
+        if self.eof:
+            return None
+
+        try:
+            chunk = await self.chunks.__anext__()
+        except StopAsyncIteration:
+            self.decoder.decode(b"", final=True)
+            self.eof = True
+            return None
+
+        return self.decoder.decode(chunk)
+
+    async def fill(self) -> bool:
+        """read the next chunk into the buffer, returns False at end of stream"""
+
+        text = await self.read()
+
+        if text is None:
+            return False
+
+        # drop consumed text, so memory stays bounded by the largest item
+        self.text = self.text[self.pos :] + text
+        self.pos = 0
+
+        if len(self.text) > self.max_item_size:
+            raise StreamParseError(f"Item exceeds {self.max_item_size} characters")
+
+        return True
+
+    async def peek(self) -> str:
+        """skip whitespace and return the next character, empty at end of stream"""
+
+        while True:
+            self.pos = WHITESPACE.match(self.text, self.pos).end()
+
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+
+            if not await self.fill():
+                return ""
+
+    async def expect(self, char: str):
+        found = await self.peek()
+
+        if found != char:
+            raise StreamParseError(f"Expected {char!r} but found {found!r}")
+
+        self.pos += 1
+
+    def scan(self, text: str, start: int) -> Optional[int]:
+        """continue scanning for the end of the current value in text,
+        returns the index after the value or None if it continues"""
+
+        if self.scalar:
+            match = SCALAR_END.search(text, start)
+            return match.start() if match else None
+
+        # the escaped character is the first of this text
+        if self.escaped and start < len(text):
+            self.escaped = False
+            start += 1
+
+        while True:
+            pattern = STRING_SPECIAL if self.in_string else STRUCTURE
+            match = pattern.search(text, start)
+
+            if not match:
+                return None
+
+            char, start = match.group(), match.end()
+
+            if self.in_string:
+                if char == "\\":
+                    if start == len(text):
+                        self.escaped = True
+                        return None
+                    start += 1
+                    continue
+                self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+            else:
+                self.depth -= 1
+
+            if not self.depth and not self.in_string:
+                return start
+
+    async def value(self):
+        """decode one complete json value starting at the current position
+
+        The end of the value is found first, scanning each chunk once, so a
+        value spanning many chunks is decoded only once it is complete.
+        """
+
+        first = await self.peek()
+
+        if not first:
+            raise StreamParseError("Unexpected end of stream")
+
+        self.scalar = first not in '{["'
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+        # end of the value relative to its start
+        end = self.scan(self.text, self.pos)
+
+        if end is not None:
+            end -= self.pos
+
+        # collect the chunks of the value and join them once
+        parts = [self.text[self.pos :]]
+        size = len(parts[0])
+
+        while end is None:
+            text = await self.read()
+
+            if text is None:
+                # a scalar at the end of the body ends with the body
+                if self.scalar:
+                    end = size
+                    break
+                raise StreamParseError("Unexpected end of stream")
+
+            end = self.scan(text, 0)
+            parts.append(text)
+
+            if end is not None:
+                end += size
+
+            size += len(text)
+
+            if size > self.max_item_size:
+                raise StreamParseError(f"Item exceeds {self.max_item_size} characters")
+
+        if len(parts) > 1:
+            self.text = "".join(parts)
+            self.pos = 0
+
+        end += self.pos
+
+        try:
+            value, decoded = self.decoder_json.raw_decode(self.text, self.pos)
+        except json.JSONDecodeError as e:
+            raise StreamParseError(str(e)) from e
+
+        if decoded != end:
+            raise StreamParseError(f"Unexpected data at {self.text[decoded:end]!r}")
+
+        self.pos = end
+        return value
+
+
+async def _navigate(buffer: _JsonBuffer, json_path: Optional[str]):
+    """move the buffer to the value found at the dotted json_path"""
+
+    for key in json_path.split(".") if json_path else []:
+        await buffer.expect("{")
+
+        while True:
+            if await buffer.peek() == "}":
+                raise StreamParseError(f"Key {key!r} of {json_path!r} not found")
+
+            name = await buffer.value()
+            await buffer.expect(":")
+
+            if name == key:
+                break
+
+            # skip the value of a sibling key
+            await buffer.value()
+
+            if await buffer.peek() == ",":
+                buffer.pos += 1
+
+
+async def iter_json_array(
+    chunks: AsyncIterator[bytes],
+    json_path: Optional[str] = None,
+    max_item_size: int = MAX_ITEM_SIZE,
+) -> AsyncIterator:
+    """parse a json array incrementally and yield its items one by one
+
+    Args:
+        chunks: async iterator of raw body bytes
+        json_path: dotted path to the array inside a wrapping object, e.g.
+            "data.items". Defaults to the top level of the body.
+        max_item_size: characters a single item may take before failing
+    """
+
+    buffer = _JsonBuffer(chunks, max_item_size=max_item_size)
+
+    await _navigate(buffer, json_path)
+    await buffer.expect("[")
+
+    if await buffer.peek() == "]":
+        return
+
+    while True:
+        yield await buffer.value()
+
+        separator = await buffer.peek()
+
+        if separator == "]":
+            return
+
+        if separator != ",":
+            raise StreamParseError(f"Expected ',' or ']' but found {separator!r}")
+
+        buffer.pos += 1
+
+
+async def iter_ndjson(
+    chunks: AsyncIterator[bytes], max_item_size: int = MAX_ITEM_SIZE
+) -> AsyncIterator:
+    """parse newline delimited json (json lines) and yield one item per line"""
+
+    def decode(line: bytes):
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            raise StreamParseError(str(e)) from e
+
+    # chunks of the current line, joined once the line is complete, so a
+    # long line is not copied again for every chunk
+    parts: list[bytes] = []
+    size = 0
+
+    async for chunk in chunks:
+        start = 0
+
+        while (end := chunk.find(b"\n", start)) != -1:
+            line = b"".join([*parts, chunk[start:end]]) if parts else chunk[start:end]
+            parts, size = [], 0
+            start = end + 1
+
+            if line.strip():
+                yield decode(line)
+
+        # the rest of the chunk starts a line which continues in the next one
+        if start < len(chunk):
+            parts.append(chunk[start:])
+            size += len(chunk) - start
+
+            if size > max_item_size:
+                raise StreamParseError(f"Item exceeds {max_item_size} bytes")
+
+    line = b"".join(parts)
+
+    if line.strip():
+        yield decode(line)
+
+
+async def iter_response(
+    response,
+    return_type: str,
+    json_path: Optional[str] = None,
+    model: Optional[type[BaseModel]] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> AsyncIterator:
+    """yield the items of a streamed aiohttp response, validated by the
+    pydantic model if given"""
+
+    chunks = response.content.iter_chunked(chunk_size)
+
+    if return_type == return_types.NDJSON.value:
+        items = iter_ndjson(chunks)
+    else:
+        items = iter_json_array(chunks, json_path)
+
+    async for item in items:
+        yield model.model_validate(item) if model else item
+
+
+@dataclass
+class ServerSentEvent:
+    event: str
+    data: str
+    id: Optional[str] = None
+
+
+class SSEDecoder:
+    """decode a text/event-stream body into events
+
+    Keeps the last event id and reconnection time of the stream, so they
+    survive reconnects when the decoder is reused.
+
+    Args:
+        last_event_id: id to resume from, sent as Last-Event-ID header
+    """
+
+    def __init__(self, last_event_id: Optional[str] = None):
+        self.last_event_id = last_event_id
+        self.retry: Optional[float] = None
+
+    async def events(
+        self, chunks: AsyncIterator[bytes]
+    ) -> AsyncIterator[ServerSentEvent]:
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        buffer = ""
+        event_type = ""
+        data: list[str] = []
+
+        # the id only becomes the last event id once its event is dispatched,
+        # so an event cut off by a disconnect is requested again
+        event_id = self.last_event_id
+
+        # a \r ending a chunk might be the first half of a \r\n line end
+        skip_newline = False
+
+        async for chunk in chunks:
+            text = decoder.decode(chunk)
+
+            # part of a multi byte character
+            if not text:
+                continue
+
+            if skip_newline and text.startswith("\n"):
+                text = text[1:]
+
+            buffer += text
+            lines = LINE_END.split(buffer)
+            remainder = lines.pop()
+
+            skip_newline = buffer.endswith("\r")
+            buffer = remainder
+
+            for line in lines:
+                # an empty line dispatches the event
+                if not line:
+                    self.last_event_id = event_id
+
+                    if data:
+                        yield ServerSentEvent(
+                            event_type or "message",
+                            "\n".join(data),
+                            self.last_event_id,
+                        )
+                    event_type = ""
+                    data = []
+                    continue
+
+                # lines starting with a colon are comments, used as heartbeat
+                if line.startswith(":"):
+                    continue
+
+                field, _, value = line.partition(":")
+                value = value[1:] if value.startswith(" ") else value
+
+                match field:
+                    case "event":
+                        event_type = value
+                    case "data":
+                        data.append(value)
+                    case "id" if "\0" not in value:
+                        event_id = value
+                    case "retry" if value.isascii() and value.isdigit():
+                        self.retry = int(value) / 1000
@@ -0,0 +1,234 @@
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import aiohttp
+
+TRACE_LOGGER = logging.getLogger("RequestTracer")
+
+
+@dataclass
+class RequestTrace:
+    """timestamps of the phases of one request, from time.perf_counter()
+
+    Phases which did not happen, such as dns resolution for a reused
+    connection, are left out of the breakdown.
+    """
+
+    method: str
+    url: str
+    endpoint: Optional[str] = None
+    status: Optional[int] = None
+    error: Optional[BaseException] = None
+
+    # wall clock start, for exporting spans
+    start_ns: int = field(default_factory=time.time_ns)
+    start: float = field(default_factory=time.perf_counter)
+    end: Optional[float] = None
+
+    # phase name to (start, end)
+    marks: dict[str, list[float]] = field(default_factory=dict)
+
+    def mark_start(self, phase: str):
+        self.marks[phase] = [time.perf_counter(), None]
+
+    def mark_end(self, phase: str):
+        if phase in self.marks:
+            self.marks[phase][1] = time.perf_counter()
+
+    @property
+    def phases(self) -> dict[str, float]:
+        """duration in seconds of each completed phase"""
+
+        return {
+            phase: end - start
+            for phase, (start, end) in self.marks.items()
+            if end is not None
+        }
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.end is None else self.end - self.start
+
+
+class RequestTracer:
+    """record the phase breakdown of sampled requests through aiohttp tracing
+
+    Phases:
+        dns: resolving the host, absent when cached
+        connection_queued: waiting for a free connection in the pool
+        connect: opening the connection, including the tls handshake
+        first_byte: from sending the request until the response headers
+        transfer: reading the response body
+        parse: decoding the body in parse_response
+
+    The transfer and parse phases are only recorded when parse_response reads
+    the body, which is not the case when the response object is returned.
+
+    Args:
+        sample_rate: fraction of requests to trace
+        callbacks: called with each finished RequestTrace
+        keep: number of recent traces kept in `traces`
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 1.0,
+        callbacks: Optional[list[Callable[[RequestTrace], None]]] = None,
+        keep: int = 100,
+    ):
+        self.sample_rate = sample_rate
+        self.callbacks = callbacks or []
+        self.traces: deque[RequestTrace] = deque(maxlen=keep)
+
+        self.trace_config = aiohttp.TraceConfig()
+        self.trace_config.on_dns_resolvehost_start.append(self._start("dns"))
+        self.trace_config.on_dns_resolvehost_end.append(self._end("dns"))
+        self.trace_config.on_connection_queued_start.append(
+            self._start("connection_queued")
+        )
+        self.trace_config.on_connection_queued_end.append(
+            self._end("connection_queued")
+        )
+        self.trace_config.on_connection_create_start.append(self._start("connect"))
+        self.trace_config.on_connection_create_end.append(self._end("connect"))
+        self.trace_config.on_request_chunk_sent.append(self._on_chunk_sent)
+        self.trace_config.on_request_end.append(self._on_request_end)
+        self.trace_config.on_response_chunk_received.append(self._on_chunk_received)
+
+    def start(
+        self, method: str, url: str, endpoint: Optional[str] = None
+    ) -> Optional[RequestTrace]:
+        """start a trace if the request is sampled"""
+
+        if random.random() >= self.sample_rate:
+            return None
+
+        return RequestTrace(method.upper(), url, endpoint)
+
+    def finish(self, trace: RequestTrace, status=None, error=None, parsed=False):
+        """close the trace and hand it to the callbacks
+
+        Args:
+            parsed: whether parse_response read and decoded the body, the
+                transfer and parse phases are left out otherwise
+        """
+
+        trace.end = time.perf_counter()
+        trace.status = status
+        trace.error = error
+
+        transfer = trace.marks.get("transfer")
+
+        if parsed and transfer:
+            # an empty body is not received in chunks
+            if transfer[1] is None:
+                transfer[1] = transfer[0]
+
+            # decoding starts once the last chunk is received
+            trace.marks["parse"] = [transfer[1], trace.end]
+
+        elif transfer:
+            del trace.marks["transfer"]
+
+        self.traces.append(trace)
+
+        for callback in self.callbacks:
+            # a failing callback should not fail the request
+            try:
+                callback(trace)
+            except Exception:
+                TRACE_LOGGER.exception("Trace callback failed")
+
+    @staticmethod
+    def _start(phase: str):
+        async def on_start(session, context, params):
+            if context.trace_request_ctx:
+                context.trace_request_ctx.mark_start(phase)
+
+        return on_start
+
+    @staticmethod
+    def _end(phase: str):
+        async def on_end(session, context, params):
+            if context.trace_request_ctx:
+                context.trace_request_ctx.mark_end(phase)
+
+        return on_end
+
+    @staticmethod
+    async def _on_chunk_sent(session, context, params):
+        trace = context.trace_request_ctx
+
+        # first byte is timed from the start of sending the request
+        if trace and "first_byte" not in trace.marks:
+            trace.mark_start("first_byte")
+
+    @staticmethod
+    async def _on_request_end(session, context, params):
+        trace = context.trace_request_ctx
+
+        if trace:
+            # requests without a body do not send chunks
+            if "first_byte" not in trace.marks:
+                connected = [end for _, end in trace.marks.values() if end]
+                trace.marks["first_byte"] = [max(connected, default=trace.start), None]
+
+            trace.mark_end("first_byte")
+            trace.mark_start("transfer")
+
+    @staticmethod
+    async def _on_chunk_received(session, context, params):
+        trace = context.trace_request_ctx
+
+        if trace:
+            trace.mark_end("transfer")
+
+
+def opentelemetry_callback(tracer=None) -> Callable[[RequestTrace], None]:
+    """create a trace callback exporting each request as an OpenTelemetry
+    span, with a child span per phase
+
+    Requires the opentelemetry-api package.
+
+    Args:
+        tracer: OpenTelemetry tracer, defaults to the tracer of pysdk
+    """
+
+    from opentelemetry import trace as otel
+
+    tracer = tracer or otel.get_tracer("pysdk")
+
+    def callback(trace: RequestTrace):
+        def ns(timestamp: float) -> int:
+            return trace.start_ns + int((timestamp - trace.start) * 1e9)
+
+        span = tracer.start_span(
+            f"{trace.method} {trace.endpoint or trace.url}",
+            kind=otel.SpanKind.CLIENT,
+            start_time=trace.start_ns,
+            attributes={
+                "http.request.method": trace.method,
+                "url.full": trace.url,
+                **({"http.response.status_code": trace.status} if trace.status else {}),
+            },
+        )
+
+        if trace.error:
+            span.record_exception(trace.error)
+            span.set_status(otel.Status(otel.StatusCode.ERROR))
+
+        context = otel.set_span_in_context(span)
+
+        for phase, (start, end) in trace.marks.items():
+            if end is not None:
+                tracer.start_span(
+                    phase, context=context, start_time=ns(start)
+                ).end(end_time=ns(end))
+
+        span.end(end_time=ns(trace.end))
+
+    return callback
@@ -0,0 +1,29 @@
+from contextlib import asynccontextmanager
+
+import pytest
+from aiohttp import web
+
+
+@asynccontextmanager
+async def serve(routes: list[web.RouteDef]):
+    """run an aiohttp server on a free local port, yields its base url"""
+
+    app = web.Application()
+    app.add_routes(routes)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+
+    try:
+        port = site._server.sockets[0].getsockname()[1]
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        await runner.cleanup()
+
+
+@pytest.fixture
+def server():
+    return serve
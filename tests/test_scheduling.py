@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from pysdk.scheduling import DeadlineExceededError, RequestScheduler
+
+
+async def request(scheduler, order, name, priority=None, deadline=None, duration=0.01):
+    try:
+        async with scheduler.slot(priority, deadline, endpoint=name[0]):
+            order.append(name)
+            await asyncio.sleep(duration)
+    except DeadlineExceededError:
+        order.append(name + "!")
+
+
+def test_weighted_fair_queuing():
+    async def run():
+        scheduler = RequestScheduler(max_concurrency=1)
+        order = []
+
+        await asyncio.gather(
+            *[request(scheduler, order, f"l{i}", "low", duration=0) for i in range(3)],
+            *[request(scheduler, order, f"h{i}", "high", duration=0) for i in range(9)],
+        )
+
+        return order, scheduler
+
+    order, scheduler = asyncio.run(run())
+
+    # the first request is admitted directly, then high gets 8 slots per low,
+    # ties in finish tag go to the request queued first
+    assert order == ["l0", *[f"h{i}" for i in range(7)], "l1", "h7", "h8", "l2"]
+    assert scheduler.active == 0
+
+
+def test_unknown_priority():
+    with pytest.raises(ValueError):
+        asyncio.run(RequestScheduler().acquire("urgent"))
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    async def run():
+        scheduler = RequestScheduler(max_concurrency=1)
+        await scheduler.acquire()
+
+        waiter = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        scheduler.release()
+        await scheduler.acquire()
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert scheduler.active == 1
+    assert scheduler.queue == []
+
+
+def test_passed_deadline_fails_before_sending():
+    async def run():
+        scheduler = RequestScheduler()
+
+        with pytest.raises(DeadlineExceededError):
+            await scheduler.acquire(deadline=scheduler.now() - 1)
+
+        return scheduler
+
+    assert asyncio.run(run()).active == 0
+
+
+def test_deadline_expires_in_queue():
+    async def run():
+        scheduler = RequestScheduler(max_concurrency=1)
+        order = []
+        deadline = scheduler.now() + 0.02
+
+        await asyncio.gather(
+            request(scheduler, order, "slow", duration=0.1),
+            request(scheduler, order, "fast", deadline=deadline),
+        )
+
+        return order
+
+    assert asyncio.run(run()) == ["slow", "fast!"]
+
+
+def test_latency_is_estimated_per_endpoint():
+    async def run():
+        scheduler = RequestScheduler()
+        order = []
+
+        # a slow bulk request does not doom a fast request to another endpoint
+        await request(scheduler, order, "bulk", "low", duration=0.2)
+        now = scheduler.now()
+        await request(scheduler, order, "user", "high", deadline=now + 0.05)
+
+        # but it does doom the next request to the same endpoint
+        await request(scheduler, order, "bulk", deadline=scheduler.now() + 0.05)
+
+        return order, scheduler
+
+    order, scheduler = asyncio.run(run())
+
+    assert order == ["bulk", "user", "bulk!"]
+    assert scheduler.latency["b"] >= 0.2
@@ -0,0 +1,44 @@
+import asyncio
+
+from aiohttp import web
+
+from pysdk import ApiSDK
+from pysdk.streaming import ServerSentEvent
+
+
+class Events(ApiSDK):
+    endpoints = {"follow": {"endpoint": "/events", "stream": "sse"}}
+
+
+def test_sse_reconnects_from_last_event_id(server):
+    seen_ids = []
+
+    async def events(request):
+        seen_ids.append(request.headers.get("Last-Event-ID"))
+
+        # the server asks the client to stop after the first reconnect
+        if len(seen_ids) > 1:
+            return web.Response(status=204)
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await response.write(b"retry: 10\nid: 1\ndata: a\n\nid: 2\ndata: cut off")
+        return response
+
+    async def run():
+        async with server([web.get("/events", events)]) as url:
+            sdk = Events(verbose=False, retry_delay=0)
+            sdk.base_url = url
+            return [event async for event in sdk.follow()]
+
+    assert asyncio.run(run()) == [ServerSentEvent("message", "a", "1")]
+    assert seen_ids == [None, "1"]
+
+
+def test_sse_keeps_session_connect_timeouts():
+    sdk = ApiSDK(timeout=5, verbose=False)
+    timeout = sdk._stream_timeout(heartbeat=60)
+
+    assert timeout.total is None
+    assert timeout.sock_read == 60
+    assert timeout.sock_connect == 5
@@ -0,0 +1,224 @@
+import asyncio
+import sqlite3
+import time
+from types import SimpleNamespace
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from pysdk import ApiSDK, return_types
+from pysdk.store import ResponseStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResponseStore(tmp_path, ttl=100, max_size=25)
+
+
+def put(store, url, body, content_type="application/json"):
+    key = store.key("get", url, {})
+    store.put(key, 200, "OK", {"Content-Type": content_type}, body)
+    return key
+
+
+def total(store):
+    with sqlite3.connect(store.path / "index.sqlite") as db:
+        return db.execute("SELECT total FROM stats").fetchone()[0]
+
+
+def blobs(store):
+    return [path for path in (store.path / "blobs").rglob("*") if path.is_file()]
+
+
+def test_key_depends_on_vary_headers_only(store):
+    key = store.key("get", "http://a", {"Authorization": "x", "X-Trace": "1"})
+
+    assert key == store.key("GET", "http://a", {"authorization": "x", "X-Trace": "2"})
+    assert key != store.key("get", "http://a", {"Authorization": "y"})
+
+
+def test_get_decodes_stored_body(store):
+    key = put(store, "http://a", b'{"x": 1}')
+    stored = store.get(key)
+
+    assert stored.status == 200
+    assert stored.headers == {"Content-Type": "application/json"}
+    assert asyncio.run(stored.json()) == {"x": 1}
+    assert store.get(store.key("get", "http://b", {})) is None
+
+
+def test_identical_bodies_are_stored_once(store):
+    put(store, "http://a", b'{"x": 1}')
+    put(store, "http://b", b'{"x": 1}')
+
+    assert len(blobs(store)) == 1
+    assert total(store) == 16
+
+
+def test_replacing_entry_keeps_total(store):
+    put(store, "http://a", b"1234")
+    put(store, "http://a", b"12345678")
+
+    assert total(store) == 8
+    assert len(blobs(store)) == 1
+
+
+def test_ttl(store):
+    key = put(store, "http://a", b"1")
+    store.ttl = 0
+    time.sleep(0.01)
+
+    assert store.get(key) is None
+    assert blobs(store) == []
+    assert total(store) == 0
+
+
+def test_least_recently_used_are_evicted(store):
+    first = put(store, "http://a", b"12345678")
+    second = put(store, "http://b", b"abcdefgh")
+
+    # make the first entry the most recently used
+    with sqlite3.connect(store.path / "index.sqlite") as db:
+        db.execute("UPDATE responses SET accessed = 0 WHERE key = ?", (second,))
+
+    third = put(store, "http://c", b"0123456789abcdef")
+
+    assert store.get(second) is None
+    assert store.get(first) is not None
+    assert store.get(third) is not None
+    assert total(store) == 24
+    assert len(blobs(store)) == 2
+
+
+def test_body_larger_than_store_is_not_stored(store):
+    key = put(store, "http://a", b"x" * 26)
+
+    assert store.get(key) is None
+    assert blobs(store) == []
+
+
+def test_missing_blob_is_a_miss(store):
+    key = put(store, "http://a", b"1")
+
+    for blob in blobs(store):
+        blob.unlink()
+
+    assert store.get(key) is None
+    assert total(store) == 0
+
+
+def test_recent_hit_does_not_write(store):
+    key = put(store, "http://a", b"1")
+
+    with sqlite3.connect(store.path / "index.sqlite") as db:
+        db.execute("UPDATE responses SET accessed = 1 WHERE key = ?", (key,))
+
+    # an outdated access time is refreshed, a recent one is left alone
+    store.get(key)
+
+    with sqlite3.connect(store.path / "index.sqlite") as db:
+        (accessed,) = db.execute("SELECT accessed FROM responses").fetchone()
+        db.execute("UPDATE responses SET accessed = ?", (accessed - 1,))
+
+    store.get(key)
+
+    with sqlite3.connect(store.path / "index.sqlite") as db:
+        assert db.execute("SELECT accessed FROM responses").fetchone()[0] == (
+            accessed - 1
+        )
+
+
+@pytest.mark.parametrize(
+    "status,cache_control,storable",
+    [
+        (200, "", True),
+        (200, "max-age=60, public", True),
+        (200, "no-store", False),
+        (200, "Private, max-age=60", False),
+        (404, "", False),
+    ],
+)
+def test_storable(status, cache_control, storable):
+    response = SimpleNamespace(status=status, headers={"Cache-Control": cache_control})
+    assert ApiSDK._storable(response) == storable
+
+
+def test_only_decoded_return_types_use_store():
+    sdk = ApiSDK(verbose=False)
+
+    assert sdk._decodes_body(return_types.JSON)
+    assert sdk._decodes_body("image")
+    assert not sdk._decodes_body(None)
+    assert not sdk._decodes_body(return_types.NDJSON)
+
+
+@pytest.mark.parametrize(
+    "content_type", ["application/json", "application/problem+json; charset=utf-8"]
+)
+def test_stored_json_content_types(store, content_type):
+    key = put(store, "http://a", b'{"x": 1}', content_type)
+    assert asyncio.run(store.get(key).json()) == {"x": 1}
+
+
+def test_stored_json_checks_content_type_like_aiohttp(store):
+    key = put(store, "http://a", b'{"x": 1}', "text/plain")
+    stored = store.get(key)
+
+    with pytest.raises(aiohttp.ContentTypeError):
+        asyncio.run(stored.json())
+
+    assert asyncio.run(stored.json(content_type=None)) == {"x": 1}
+
+
+class Items(ApiSDK):
+    endpoints = {"items": "/items", "text": "/text"}
+
+
+def serve_items(server, store, calls):
+    """call the endpoints twice on a local server with a store, returns the
+    results and the number of requests the server received"""
+
+    received = []
+
+    async def items(request):
+        received.append(request.path)
+        return web.json_response({"x": 1})
+
+    async def text(request):
+        received.append(request.path)
+        return web.Response(text='{"x": 1}')
+
+    async def run():
+        routes = [web.get("/items", items), web.get("/text", text)]
+
+        async with server(routes) as url:
+            sdk = Items(verbose=False, max_retries=0, response_store=store)
+            sdk.base_url = url
+
+            results = []
+            for name in calls * 2:
+                try:
+                    results.append(await getattr(sdk, name)(return_type="json"))
+                except Exception as e:
+                    results.append(e)
+
+            return results, received
+
+    return asyncio.run(run())
+
+
+def test_warm_store_answers_without_request(server, store):
+    results, received = serve_items(server, store, ["items"])
+
+    assert results == [{"x": 1}, {"x": 1}]
+    assert received == ["/items"]
+
+
+def test_failed_parse_is_not_stored(server, store):
+    results, received = serve_items(server, store, ["text"])
+
+    # the second call fails the same way, instead of succeeding from the store
+    assert all(isinstance(r, aiohttp.ContentTypeError) for r in results)
+    assert received == ["/text", "/text"]
+    assert blobs(store) == []
@@ -0,0 +1,138 @@
+import asyncio
+import json
+
+import pytest
+
+from pysdk.streaming import (
+    ServerSentEvent,
+    SSEDecoder,
+    StreamParseError,
+    iter_json_array,
+    iter_ndjson,
+)
+
+BODY = {
+    "meta": {"skipped": [1, {"a": "}]"}], "text": 'q"]\\'},
+    "data": {"items": [1, 123456, -2.5e10, {"k": "vé"}, [1, [2]], "s", None, True]},
+}
+
+
+async def chunked(body: bytes, size: int):
+    for i in range(0, len(body), size):
+        yield body[i : i + size]
+
+
+def collect(items) -> list:
+    async def run():
+        return [item async for item in items]
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 4096])
+def test_json_path(size):
+    body = json.dumps(BODY, ensure_ascii=False).encode()
+    items = collect(iter_json_array(chunked(body, size), "data.items"))
+    assert items == BODY["data"]["items"]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3])
+def test_numbers_split_across_chunks(size):
+    body = b"[123456789, 1.25e-3,-7 ,0]"
+    assert collect(iter_json_array(chunked(body, size))) == [123456789, 1.25e-3, -7, 0]
+
+
+def test_empty_array():
+    assert collect(iter_json_array(chunked(b" [ ] ", 1))) == []
+
+
+def test_escaped_quote_at_chunk_boundary():
+    body = json.dumps([{"a": 'x\\"]'}, "b"]).encode()
+    for size in range(1, len(body)):
+        assert collect(iter_json_array(chunked(body, size))) == [{"a": 'x\\"]'}, "b"]
+
+
+@pytest.mark.parametrize(
+    "body,path",
+    [(b"[1, 2", None), (b'[{"a": 1]', None), (b'{"a": [1]}', "b"), (b"[1x]", None)],
+)
+def test_malformed(body, path):
+    with pytest.raises(StreamParseError):
+        collect(iter_json_array(chunked(body, 2), path))
+
+
+def test_max_item_size():
+    body = b'["' + b"x" * 100
+    with pytest.raises(StreamParseError, match="exceeds"):
+        collect(iter_json_array(chunked(body, 8), max_item_size=32))
+
+
+@pytest.mark.parametrize("size", [1, 3, 4096])
+def test_ndjson(size):
+    body = b'{"a": 1}\n\n{"a": 22}\r\n{"a": 3}'
+    assert collect(iter_ndjson(chunked(body, size))) == [{"a": 1}, {"a": 22}, {"a": 3}]
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n", "\r"])
+@pytest.mark.parametrize("size", [1, 2, 3, 4096])
+def test_sse_line_endings(newline, size):
+    lines = [": heartbeat", "", "id: 1", "event: tick", "data: a", "data:b", ""]
+    lines += ["retry: 1500", "retry: ²", "id: 2", ""]
+    lines += ["data: é", "", "data: c", "", ""]
+    body = newline.join(lines)
+    decoder = SSEDecoder()
+    events = collect(decoder.events(chunked(body.encode(), size)))
+
+    assert events == [
+        ServerSentEvent("tick", "a\nb", "1"),
+        ServerSentEvent("message", "é", "2"),
+        ServerSentEvent("message", "c", "2"),
+    ]
+    assert decoder.retry == 1.5
+
+
+def test_sse_cr_dispatches_without_more_data():
+    async def run():
+        queue = asyncio.Queue()
+        queue.put_nowait(b"data: a\r\r")
+
+        async def chunks():
+            while chunk := await queue.get():
+                yield chunk
+
+        events = SSEDecoder().events(chunks())
+        event = await events.__anext__()
+        queue.put_nowait(None)
+        return event
+
+    assert asyncio.run(run()) == ServerSentEvent("message", "a", None)
+
+
+def test_sse_id_of_cut_off_event_is_not_committed():
+    decoder = SSEDecoder("0")
+    events = collect(decoder.events(chunked(b"data: a\n\nid: 5\ndata: partial", 4)))
+
+    assert events == [ServerSentEvent("message", "a", "0")]
+    assert decoder.last_event_id == "0"
+
+    # the reconnect resumes from the last dispatched event
+    events = collect(decoder.events(chunked(b"id: 5\ndata: b\n\nid: 6\n\n", 4)))
+
+    assert events == [ServerSentEvent("message", "b", "5")]
+    assert decoder.last_event_id == "6"
+
+
+def test_ndjson_long_line_across_chunks():
+    body = json.dumps({"x": "a" * 100_000}).encode() + b"\n[1]\n"
+    assert collect(iter_ndjson(chunked(body, 64))) == [{"x": "a" * 100_000}, [1]]
+
+
+@pytest.mark.parametrize("body", [b'{"a": 1}\n{"a": \n', b'{"a": 1}\n{"a"'])
+def test_ndjson_malformed(body):
+    with pytest.raises(StreamParseError):
+        collect(iter_ndjson(chunked(body, 3)))
+
+
+def test_ndjson_max_item_size():
+    with pytest.raises(StreamParseError, match="exceeds"):
+        collect(iter_ndjson(chunked(b"[" + b"1," * 100, 8), max_item_size=32))
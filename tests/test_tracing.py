@@ -0,0 +1,180 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from pysdk import ApiSDK, return_types
+from pysdk.tracing import RequestTrace, RequestTracer, opentelemetry_callback
+
+
+class Items(ApiSDK):
+    endpoints = {"items": "/items", "broken": "/broken"}
+
+
+async def items(request):
+    return web.json_response([{"id": i} for i in range(1000)])
+
+
+async def broken(request):
+    return web.Response(text="not json")
+
+
+ROUTES = [web.get("/items", items), web.get("/broken", broken)]
+
+
+def fetch(server, calls, **sdk_kwargs):
+    """call the endpoints on a local server, returns the sdk and results"""
+
+    async def run():
+        async with server(ROUTES) as url:
+            sdk = Items(verbose=False, max_retries=0, **sdk_kwargs)
+            sdk.base_url = url
+
+            results = []
+            for name, kwargs in calls:
+                try:
+                    results.append(await getattr(sdk, name)(**kwargs))
+                except Exception as e:
+                    results.append(e)
+
+            return sdk, results
+
+    return asyncio.run(run())
+
+
+def test_phases_of_decoded_response(server):
+    traces = []
+    sdk, results = fetch(
+        server,
+        [("items", {"return_type": return_types.JSON})],
+        trace_sample_rate=1,
+        trace_callbacks=[traces.append],
+    )
+
+    assert len(results[0]) == 1000
+    assert list(sdk.tracer.traces) == traces
+
+    (trace,) = traces
+    assert trace.method == "GET"
+    assert trace.endpoint == "items"
+    assert trace.status == 200
+    assert trace.error is None
+    assert {"connect", "first_byte", "transfer", "parse"} <= set(trace.phases)
+    assert all(duration >= 0 for duration in trace.phases.values())
+    assert sum(trace.phases.values()) <= trace.duration
+
+    # the phases follow each other
+    marks = trace.marks
+    assert marks["connect"][1] <= marks["first_byte"][1] <= marks["transfer"][1]
+    assert marks["transfer"][1] == marks["parse"][0]
+
+
+def test_unread_body_has_no_transfer_or_parse(server):
+    traces = []
+    fetch(
+        server,
+        [("items", {})],
+        trace_sample_rate=1,
+        trace_callbacks=[traces.append],
+    )
+
+    (trace,) = traces
+    assert "first_byte" in trace.phases
+    assert "transfer" not in trace.marks
+    assert "parse" not in trace.marks
+
+
+def test_failed_request_is_traced(server):
+    traces = []
+    _, results = fetch(
+        server,
+        [("broken", {"return_type": return_types.JSON})],
+        trace_sample_rate=1,
+        trace_callbacks=[traces.append],
+    )
+
+    assert isinstance(results[0], Exception)
+    (trace,) = traces
+    assert trace.error is results[0]
+    assert "parse" not in trace.marks
+
+
+def test_failing_callback_does_not_fail_request(server):
+    def callback(trace):
+        raise RuntimeError("callback")
+
+    _, results = fetch(
+        server,
+        [("items", {"return_type": return_types.JSON})],
+        trace_sample_rate=1,
+        trace_callbacks=[callback],
+    )
+
+    assert len(results[0]) == 1000
+
+
+def test_tracing_is_opt_in(server):
+    sdk, _ = fetch(server, [("items", {"return_type": return_types.JSON})])
+
+    assert sdk.tracer is None
+    assert "trace_configs" not in sdk.client_args
+
+
+@pytest.mark.parametrize("rate,sampled", [(0.0, False), (1.0, True)])
+def test_sampling(rate, sampled):
+    tracer = RequestTracer(sample_rate=rate)
+    traces = [tracer.start("get", "http://a") for _ in range(20)]
+
+    assert all((trace is not None) == sampled for trace in traces)
+
+
+def test_sample_rate_threshold(monkeypatch):
+    values = iter([0.1, 0.3, 0.5, 0.7, 0.9])
+    monkeypatch.setattr("pysdk.tracing.random.random", lambda: next(values))
+
+    tracer = RequestTracer(sample_rate=0.5)
+    sampled = [tracer.start("get", "http://a") is not None for _ in range(5)]
+
+    assert sampled == [True, True, False, False, False]
+
+
+def test_opentelemetry_spans():
+    sdk = pytest.importorskip("opentelemetry.sdk.trace")
+    export = pytest.importorskip("opentelemetry.sdk.trace.export")
+    in_memory = pytest.importorskip(
+        "opentelemetry.sdk.trace.export.in_memory_span_exporter"
+    )
+
+    exporter = in_memory.InMemorySpanExporter()
+    provider = sdk.TracerProvider()
+    provider.add_span_processor(export.SimpleSpanProcessor(exporter))
+
+    trace = RequestTrace("GET", "http://a/items", endpoint="items", status=200)
+    trace.marks = {
+        "connect": [trace.start, trace.start + 0.01],
+        "first_byte": [trace.start + 0.01, trace.start + 0.03],
+        "transfer": [trace.start + 0.03, None],
+    }
+    trace.end = trace.start + 0.05
+
+    opentelemetry_callback(provider.get_tracer("test"))(trace)
+
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+
+    # incomplete phases are not exported
+    assert set(spans) == {"GET items", "connect", "first_byte"}
+
+    request = spans["GET items"]
+    assert request.attributes["http.response.status_code"] == 200
+    assert request.end_time - request.start_time == pytest.approx(5e7, rel=1e-3)
+
+    first_byte = spans["first_byte"]
+    assert first_byte.parent.span_id == request.context.span_id
+    assert first_byte.start_time - request.start_time == pytest.approx(1e7, rel=1e-3)
+
+
+def test_phases_leave_out_incomplete_marks():
+    trace = RequestTrace("GET", "http://a")
+    trace.marks = {"dns": [1.0, 1.5], "connect": [1.5, None]}
+
+    assert trace.phases == {"dns": 0.5}